@@ -7,15 +7,101 @@ and manages CSV file generation with a maximum of 120 files (2 hours of data)
 import time
 import asyncio
 import threading
-from datetime import datetime, timedelta
+import queue
+from datetime import date, datetime, timedelta
 from mpu6050 import mpu6050
 import json
 import os
+import errno
 import psutil
 from pathlib import Path
 import csv
 from collections import deque
+from functools import lru_cache, partial
+from array import array
+import mmap
 import shutil
+import struct
+from math import sqrt
+
+try:
+    import orjson  # optional: faster JSON parsing/encoding
+except ImportError:
+    orjson = None
+
+try:
+    from smbus2 import i2c_msg  # optional: register select + read as one combined I2C transfer
+except ImportError:
+    i2c_msg = None
+
+try:
+    # optional: absolute-deadline sleeps via clock_nanosleep(TIMER_ABSTIME) on Linux
+    import ctypes
+    import ctypes.util
+    
+    class Timespec(ctypes.Structure):
+        _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+    
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    clock_nanosleep = libc.clock_nanosleep
+    clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(Timespec), ctypes.c_void_p]
+    # Deadlines come from perf_counter(), so it must read the same clock
+    if time.get_clock_info('perf_counter').implementation != 'clock_gettime(CLOCK_MONOTONIC)':
+        clock_nanosleep = None
+except (ImportError, OSError, AttributeError, TypeError):
+    libc = None
+    clock_nanosleep = None
+
+CLOCK_MONOTONIC = 1
+TIMER_ABSTIME = 1
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+PR_SET_TIMERSLACK = 29
+
+# Seconds of samples allowed to wait for the writer; beyond this (disk stalled)
+# new seconds are dropped rather than growing locked memory without bound
+MAX_PENDING_SECONDS = 60
+
+# CPU core dedicated to the sampling thread (usually least used on Pi 4)
+SENSOR_CORE = 3
+
+# Raw count to g-force (MPU6050 sensitivity: 16384 LSB/g for ±2g range); a power
+# of two, so multiplying by the reciprocal gives exactly the same result as dividing
+ACCEL_SCALE = 1.0 / 16384.0
+
+# ACCEL_XOUT_H..ACCEL_ZOUT_L: three big-endian signed 16-bit counts
+ACCEL_STRUCT = struct.Struct('>hhh')
+
+# Per-second CSV layout, matching csv.writer's default dialect; the header is
+# kept pre-encoded so every file reuses the same bytes object
+CSV_HEADER = b"Time (ms),Acceleration\r\n"
+
+# 'Time (ms)' strings are assembled from two lookup tables (whole milliseconds,
+# then the trailing-zero-trimmed microsecond fraction plus suffix) instead of
+# float formatting and stripping every sample
+MS_WHOLE = [str(ms) for ms in range(1000)]
+MS_FRACTION = [(f".{frac:03d}".rstrip('0') if frac else "") + "ms" for frac in range(1000)]
+
+@lru_cache(maxsize=8)
+def _parse_config(path, mtime_ns):
+    """Parse a JSON config file once per (path, mtime)"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read()) if orjson else json.load(f)
+
+def read_config(path):
+    """Return the parsed config file, re-parsing only when its mtime changes (treat the result as read-only)"""
+    return _parse_config(os.fspath(path), os.stat(path).st_mtime_ns)
+
+def _write_all(fd, chunks):
+    """writev() the chunks to fd, finishing with plain writes after a short write"""
+    written = os.writev(fd, chunks)
+    if written < sum(map(len, chunks)):
+        remaining = memoryview(b"".join(chunks))[written:]
+        while remaining:
+            written = os.write(fd, remaining)
+            if written == 0:
+                raise OSError(errno.EIO, "write returned 0 bytes")
+            remaining = remaining[written:]
 
 class HighSpeedSensorService:
     def __init__(self, config_file="config.json"):
@@ -29,22 +115,57 @@ class HighSpeedSensorService:
         # Sensor connection
         self.mpu = None
         self.connected = False
+        self.i2c_speed_checked = False
         
         # File management
         self.readings_dir = Path(self.config.get('csv', {}).get('readings_directory', 'readings'))
         self.readings_dir.mkdir(exist_ok=True)
+        self.day_folder = None  # (date, day folder already created by the writer, open dir fd)
+        self.cleanup_date = None  # date the retention sweep last ran for
+        
+        # Directory listings are cached and invalidated whenever the writer
+        # adds or removes a file, instead of walking the tree on every request.
+        # They are derived from an in-memory index that is built by one walk on
+        # first use and then kept in step by the writer as files come and go
+        self.file_index = None              # {relative path: (size, mtime)}
+        self.index_lock = threading.Lock()
+        self.files_version = 0
+        self.file_list_cache = None         # (files_version, [relative paths])
+        self.folder_structure_cache = None  # (files_version, nested dict)
+        self.file_stats_cache = None        # (files_version, stats dict)
+        self.latest_file = None             # relative path of the newest file written
         
-        # Data buffer for current second
-        self.current_buffer = []
-        self.buffer_lock = threading.Lock()
+        # Data buffer for current second, stored as parallel columns filled by
+        # index so the sampling loop never builds a per-sample dict. Only the
+        # sensor thread touches it (stop() flushes after joining that thread),
+        # so filling it needs no lock; the writer only sees swapped-out buffers
+        self.buffer_capacity = self.sampling_rate + 64
+        # 32-bit columns, at half the memory of 'l'/'d': microseconds fit in an
+        # int32, and a float32 magnitude is good to ~7 significant digits, though
+        # a value near a half-way point can round differently in the 4th decimal
+        self.time_buffer = array('i', [0]) * self.buffer_capacity  # microseconds into the second
+        self.accel_buffer = array('f', [0.0]) * self.buffer_capacity
+        self.buffer_count = 0
+        
+        # Filled buffers are handed to a writer thread so disk I/O stays off the sampling loop
+        self.write_queue = queue.SimpleQueue()
+        self.writer_thread = None
+        self.sensor_thread = None
+        # Written column pairs come back here for reuse instead of allocating new ones each second
+        self.free_buffers = deque()
+        self.dropped_seconds = 0  # seconds discarded while the writer was backlogged
         
         # File management - maximum 120 files (2 hours)
         self.max_files = 120
         self.file_queue = deque()  # Keep track of files for aggregation
         
-        # Aggregate file
+        # Aggregate file, appended to one second at a time. Each appended second
+        # is tracked as (byte offset, sample count) so the oldest seconds can be
+        # dropped from the front without re-serialising the whole window
         self.aggregate_file = self.readings_dir / "aggregate_data.csv"
-        self.aggregate_data = []  # Store all data points for aggregation
+        self.aggregate_chunks = deque()
+        self.aggregate_samples = 0
+        self.aggregate_end = None  # file size; None until this session's file is started
         
         # Control flags
         self.running = False
@@ -64,7 +185,7 @@ class HighSpeedSensorService:
         self.window_duration_sec = 2 * 60 * 60  # 2 hours
         self.window_start = _dt.now()
         self.max_value_in_window = float('-inf')
-        self.max_record_in_window = None  # {'timestamp': iso, 'acceleration': float}
+        self.max_record_in_window = None  # (second datetime, microseconds, raw acceleration)
 
         # Outbox directory at repo root for auto-upload via sender_watch.py
         # backend/ -> parents[1] is repo root
@@ -82,8 +203,7 @@ class HighSpeedSensorService:
     def load_config(self, config_file):
         """Load configuration from JSON file"""
         try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
+            config = read_config(config_file)
             print(f"Configuration loaded from {config_file}")
             return config
         except FileNotFoundError:
@@ -102,6 +222,23 @@ class HighSpeedSensorService:
             }
         }
     
+    def check_i2c_speed(self, bus=1):
+        """Warn once if the I2C bus clock is below 400 kHz, too slow for comfortable 800 Hz reads"""
+        if self.i2c_speed_checked:
+            return
+        self.i2c_speed_checked = True
+        for path in (f"/sys/class/i2c-adapter/i2c-{bus}/of_node/clock-frequency",
+                     f"/sys/class/i2c-dev/i2c-{bus}/device/of_node/clock-frequency"):
+            try:
+                with open(path, 'rb') as f:
+                    frequency = int.from_bytes(f.read(4), 'big')
+            except OSError:
+                continue
+            if frequency < 400000:
+                print(f"Warning: I2C bus {bus} runs at {frequency // 1000} kHz; add "
+                      f"'dtparam=i2c_arm_baudrate=400000' to /boot/config.txt for 800 Hz sampling")
+            return
+    
     def connect_sensor(self) -> bool:
         """Connect to MPU6050 sensor with maximum performance settings"""
         try:
@@ -128,6 +265,7 @@ class HighSpeedSensorService:
                 
                 self.connected = True
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Sensor connected with maximum performance settings")
+                self.check_i2c_speed()
                 print(f"Initial test reading: X={test_data['x']:.2f}, Y={test_data['y']:.2f}, Z={test_data['z']:.2f}")
                 return True
                 
@@ -182,12 +320,16 @@ class HighSpeedSensorService:
         except PermissionError:
             print("Could not set high priority (requires root)")
         
-        # Set CPU affinity to dedicate a core (if possible)
+        # Set CPU affinity to dedicate a core (if possible): this thread, and the
+        # writer started from it, move off the sensor core; the sensor thread
+        # pins itself onto that core when it starts
         try:
             process = psutil.Process()
-            # Pin to CPU core 3 (usually least used on Pi 4)
-            process.cpu_affinity([3])
-            print("CPU affinity set to core 3 for maximum performance")
+            cores = process.cpu_affinity()
+            other_cores = [core for core in cores if core != SENSOR_CORE]
+            if SENSOR_CORE in cores and other_cores:
+                process.cpu_affinity(other_cores)
+                print(f"CPU core {SENSOR_CORE} reserved for the sensor thread")
         except (PermissionError, psutil.NoSuchProcess):
             print("Could not set CPU affinity")
         
@@ -198,6 +340,14 @@ class HighSpeedSensorService:
             name="HighPerformance-Sensor"
         )
         
+        # Writer thread drains completed seconds to disk
+        self.writer_thread = threading.Thread(
+            target=self._writer_loop,
+            daemon=True,
+            name="CSV-Writer"
+        )
+        self.writer_thread.start()
+        
         # Set thread priority if possible
         self.sensor_thread.start()
         
@@ -213,12 +363,17 @@ class HighSpeedSensorService:
         self.running = False
         
         # Wait for thread to finish
-        if hasattr(self, 'sensor_thread'):
+        if self.sensor_thread is not None:
             self.sensor_thread.join(timeout=2)
         
-        # Save any remaining data and cleanup
-        self._save_current_buffer()
-        self._update_aggregate_file()
+        # Queue any remaining data (only once the sensor thread no longer owns
+        # the buffer), then let the writer drain and exit
+        if self.sensor_thread is None or not self.sensor_thread.is_alive():
+            self._save_current_buffer()
+        if self.writer_thread:
+            self.write_queue.put(None)
+            self.writer_thread.join(timeout=5)
+            self.writer_thread = None
         
         print("Sensor service stopped")
     
@@ -232,127 +387,374 @@ class HighSpeedSensorService:
         self.paused = False
         print("Data collection resumed")
     
-    def _format_ms(self, ms_value: float) -> str:
-        """Format milliseconds with up to 4 decimal places and 'ms' suffix"""
-        s = f"{ms_value:.4f}".rstrip('0').rstrip('.')
-        return f"{s}ms"
-    
-    def _save_current_buffer(self):
-        """Save the current buffer to a CSV file"""
-        if not self.current_buffer or len(self.current_buffer) == 0:
+    def _save_current_buffer(self, current_second=None):
+        """Hand the current buffer to the writer thread and start a fresh one"""
+        count = self.buffer_count
+        if count == 0:
             return
-            
-        current_second = datetime.now().replace(microsecond=0)
-        
-        # Create hierarchical folder structure: readings/YYYY/MM/Week_N/DD/
-        year = current_second.strftime("%Y")
-        month = current_second.strftime("%m")
-        day = current_second.strftime("%d")
-        
-        # Calculate week number within the month
-        week_num = ((current_second.day - 1) // 7) + 1
-        week_folder = f"Week_{week_num}"
+        if not self.free_buffers and self.write_queue.qsize() > MAX_PENDING_SECONDS:
+            # Writer is stalled: drop this second and keep refilling the same buffer
+            self.buffer_count = 0
+            self.dropped_seconds += 1
+            if self.dropped_seconds == 1:
+                print(f"[{time.strftime('%H:%M:%S')}] Writer backlogged, dropping samples until it catches up")
+            return
+        if self.dropped_seconds:
+            print(f"[{time.strftime('%H:%M:%S')}] Writer caught up after {self.dropped_seconds} dropped second(s)")
+            self.dropped_seconds = 0
+        time_buffer, accel_buffer = self.time_buffer, self.accel_buffer
+        if self.free_buffers:
+            self.time_buffer, self.accel_buffer = self.free_buffers.pop()
+        else:
+            self.time_buffer = array('i', [0]) * self.buffer_capacity
+            self.accel_buffer = array('f', [0.0]) * self.buffer_capacity
+        self.buffer_count = 0
         
-        # Create folder structure
-        folder_path = self.readings_dir / year / month / week_folder / day
-        folder_path.mkdir(parents=True, exist_ok=True)
+        if current_second is None:
+            current_second = datetime.now().replace(microsecond=0)
+        self.write_queue.put((time_buffer, accel_buffer, count, current_second))
+    
+    def _writer_loop(self):
+        """Write queued per-second buffers to disk until a None sentinel arrives"""
+        get_nowait = self.write_queue.get_nowait
+        while True:
+            batch = [self.write_queue.get()]
+            # Drain anything else already queued so a backlog is written in one pass
+            while batch[-1] is not None:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            
+            written = []
+            for item in batch:
+                if item is None:
+                    break
+                # One bad item must never stop persistence: log it and move on
+                try:
+                    if isinstance(item, str):
+                        # Status line deferred from the sensor loop
+                        print(item)
+                    elif callable(item):
+                        # Other file output deferred from the sensor loop (window max CSV)
+                        item()
+                    else:
+                        try:
+                            rows = self._write_buffer(*item)
+                        finally:
+                            self._recycle_buffers(item[0], item[1])
+                        if rows:
+                            written.append((rows, item[2]))
+                except Exception as e:
+                    print(f"[{time.strftime('%H:%M:%S')}] Writer error: {e}")
+            
+            # Append the whole batch to the aggregate in one write
+            if written:
+                try:
+                    self._update_aggregate_file(written)
+                except Exception as e:
+                    print(f"[{time.strftime('%H:%M:%S')}] Writer error: {e}")
+            
+            if batch[-1] is None:
+                break
         
-        # Generate filename: HHMMSS.csv (since date is in folder structure)
+        self._close_day_folder()
+    
+    def _close_day_folder(self):
+        """Forget the cached day folder and release its directory descriptor"""
+        day_folder, self.day_folder = self.day_folder, None
+        if day_folder is not None and day_folder[2] is not None:
+            try:
+                os.close(day_folder[2])
+            except OSError:
+                pass
+    
+    def _recycle_buffers(self, time_buffer, accel_buffer):
+        """Return a written column pair to the free list, trimmed back to its preallocated size"""
+        del time_buffer[self.buffer_capacity:]
+        del accel_buffer[self.buffer_capacity:]
+        self.free_buffers.append((time_buffer, accel_buffer))
+    
+    def _write_buffer(self, time_buffer, accel_buffer, count, current_second) -> bytes:
+        """Save one second of samples to a CSV file; returns the encoded rows, or None on failure"""
+        # Hierarchical layout: readings/YYYY/MM/Week_N/DD/HHMMSS.csv
+        # The day folder is keyed on the date, so it is built and created once per day.
+        # It is held open as a directory descriptor and files are created relative
+        # to it, so the per-second open() does no path lookup from the root
         filename = current_second.strftime("%H%M%S.csv")
-        filepath = folder_path / filename
+        
+        # Format the 'Time (ms)' column and round accelerations once per file rather than once per sample
+        times = [MS_WHOLE[us // 1000] + MS_FRACTION[us % 1000] for us in time_buffer[:count]]
+        accels = [round(value, 4) for value in accel_buffer[:count]]
         
         try:
-            with open(filepath, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['Time (ms)', 'Acceleration'])
-                
-                # Write data
-                for sample in self.current_buffer:
-                    writer.writerow([sample['time_ms'], sample['acceleration']])
+            today = current_second.date()
+            day_folder = self.day_folder
+            if day_folder is None or day_folder[0] != today:
+                self._close_day_folder()
+                # New day: prune folders past the retention period first, so a
+                # full disk gets space back before the new folder is created
+                if self.cleanup_date != today:
+                    self.cleanup_date = today
+                    self.cleanup_old_files()
+                week_num = ((current_second.day - 1) // 7) + 1
+                folder_path = self.readings_dir / current_second.strftime(f"%Y/%m/Week_{week_num}/%d")
+                folder_path.mkdir(parents=True, exist_ok=True)
+                dir_fd = None
+                if os.open in os.supports_dir_fd:
+                    try:
+                        dir_fd = os.open(folder_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+                    except OSError as e:
+                        # Fall back to opening files by path
+                        print(f"Could not open day folder {folder_path}: {e}")
+                self.day_folder = day_folder = (today, folder_path, dir_fd)
+            filepath = day_folder[1] / filename
+            
+            # Format the rows as one string (same text csv.writer would emit,
+            # '\r\n' line endings included), encode it once and write it together
+            # with the header bytes in a single writev() call.
+            # Rows are joined with C-level str.join/repr calls, no per-row format()
+            rows = "\r\n".join(map(",".join, zip(times, map(repr, accels))))
+            body = (rows + "\r\n").encode()
+            # Raw descriptor: no file object to build and tear down every second
+            if day_folder[2] is not None:
+                fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666, dir_fd=day_folder[2])
+            else:
+                fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                try:
+                    _write_all(fd, (CSV_HEADER, body))
+                    stat = os.fstat(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                # Don't leave a truncated CSV behind to be listed or uploaded
+                try:
+                    os.unlink(filepath)
+                except OSError:
+                    pass
+                raise
             
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Saved {len(self.current_buffer)} samples to {filename}")
+            print(f"[{time.strftime('%H:%M:%S')}] Saved {count} samples to {filename}")
             
             # Add to file queue for aggregation
             self.file_queue.append(filepath)
-            
-            # Add data to aggregate collection
-            self.aggregate_data.extend(self.current_buffer)
+            self.latest_file = str(filepath.relative_to(self.readings_dir))
+            self._index_update(add=(self.latest_file, stat))
             
             # Maintain maximum file count (120 files = 2 hours)
-            if len(self.file_queue) > self.max_files:
-                # Remove oldest file
+            while len(self.file_queue) > self.max_files:
+                # Remove oldest file; unlink directly instead of stat-then-unlink
                 oldest_file = self.file_queue.popleft()
-                if oldest_file.exists():
-                    try:
-                        oldest_file.unlink()
-                        print(f"Removed oldest file: {oldest_file}")
-                    except Exception as e:
-                        print(f"Error removing oldest file: {e}")
-                
-                # Remove corresponding data from aggregate (keep only data from last 120 files)
-                if len(self.aggregate_data) > self.max_files * self.sampling_rate:
-                    # Remove oldest data points
-                    points_to_remove = len(self.aggregate_data) - (self.max_files * self.sampling_rate)
-                    self.aggregate_data = self.aggregate_data[points_to_remove:]
+                try:
+                    os.unlink(oldest_file)
+                    print(f"Removed oldest file: {oldest_file}")
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing oldest file: {e}")
+                    continue
+                self._index_update(remove=str(oldest_file.relative_to(self.readings_dir)))
             
-            # Update aggregate file
-            self._update_aggregate_file()
+            # Invalidate cached directory listings
+            self.files_version += 1
+            return body
             
         except Exception as e:
             print(f"Error saving CSV file {filename}: {e}")
+            # Folder may have been removed underneath us; recreate it next time
+            self._close_day_folder()
+            return None
+    
+    def cleanup_old_files(self):
+        """Remove whole day folders (YYYY/MM/Week_N/DD) older than the retention period"""
+        retention_days = self.config.get('csv', {}).get('retention_days', 365)
+        cutoff_date = (datetime.now() - timedelta(days=retention_days)).date()
+        removed = 0
         
-        # Clear buffer
-        self.current_buffer = []
+        try:
+            for year_dir in self.readings_dir.iterdir():
+                if not year_dir.is_dir() or not year_dir.name.isdigit():
+                    continue
+                removed_in_year = removed
+                for month_dir in year_dir.iterdir():
+                    if not month_dir.is_dir() or not month_dir.name.isdigit():
+                        continue
+                    removed_in_month = removed
+                    for week_dir in month_dir.iterdir():
+                        if not week_dir.is_dir():
+                            continue
+                        removed_in_week = removed
+                        for day_dir in week_dir.iterdir():
+                            try:
+                                day_date = date(int(year_dir.name), int(month_dir.name), int(day_dir.name))
+                            except ValueError:
+                                continue
+                            if day_date < cutoff_date:
+                                shutil.rmtree(day_dir, ignore_errors=True)
+                                self._index_update(remove_prefix=str(day_dir.relative_to(self.readings_dir)) + os.sep)
+                                removed += 1
+                        if removed > removed_in_week:
+                            self._remove_if_empty(week_dir)
+                    if removed > removed_in_month:
+                        self._remove_if_empty(month_dir)
+                if removed > removed_in_year:
+                    self._remove_if_empty(year_dir)
+        except Exception as e:
+            print(f"Error cleaning up old files: {e}")
+        
+        if removed:
+            self.files_version += 1
+            print(f"Removed {removed} day folder(s) older than {retention_days} days")
+    
+    def _remove_if_empty(self, folder):
+        """Remove a week/month/year folder left empty by cleanup; keep it if anything remains"""
+        try:
+            folder.rmdir()
+        except OSError:
+            pass
     
-    def _update_aggregate_file(self):
-        """Update the aggregate CSV file with all current data"""
+    def _update_aggregate_file(self, seconds):
+        """Append newly saved seconds, given as (encoded rows, sample count), to the aggregate CSV"""
         try:
-            # Create temporary file first
-            temp_file = self.aggregate_file.with_suffix('.tmp')
+            if self.aggregate_end is None:
+                # First write of this session starts a fresh file
+                with open(self.aggregate_file, 'wb', buffering=0) as csvfile:
+                    csvfile.write(CSV_HEADER)
+                self.aggregate_chunks.clear()
+                self.aggregate_samples = 0
+                self.aggregate_end = len(CSV_HEADER)
             
-            with open(temp_file, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['Time (ms)', 'Acceleration'])
-                
-                # Write all aggregated data
-                for sample in self.aggregate_data:
-                    writer.writerow([sample['time_ms'], sample['acceleration']])
+            with open(self.aggregate_file, 'ab', buffering=0) as csvfile:
+                try:
+                    _write_all(csvfile.fileno(), [rows for rows, _ in seconds])
+                except OSError as e:
+                    # Cut the partial append off so the recorded offsets still match the file
+                    os.ftruncate(csvfile.fileno(), self.aggregate_end)
+                    print(f"Error appending to aggregate file: {e}")
+                    return
+            for rows, count in seconds:
+                self.aggregate_chunks.append((self.aggregate_end, count))
+                self.aggregate_end += len(rows)
+                self.aggregate_samples += count
+            
+            # Keep only data from the last 120 files' worth of samples, dropping whole seconds
+            limit = self.max_files * self.sampling_rate
+            while self.aggregate_samples - self.aggregate_chunks[0][1] >= limit:
+                self.aggregate_samples -= self.aggregate_chunks.popleft()[1]
             
-            # Atomically replace the aggregate file
-            temp_file.replace(self.aggregate_file)
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Updated aggregate file with {len(self.aggregate_data)} samples")
+            # Dropped seconds stay in the file until they exceed 10% of it,
+            # so the front is only cut (by copying the live bytes) every few seconds
+            dead = self.aggregate_chunks[0][0] - len(CSV_HEADER)
+            if dead * 10 > self.aggregate_end:
+                self._compact_aggregate_file()
+            
+            print(f"[{time.strftime('%H:%M:%S')}] Updated aggregate file with {self.aggregate_samples} samples")
             
         except Exception as e:
             print(f"Error updating aggregate file: {e}")
+            # Start over with a fresh file on the next write
+            self.aggregate_end = None
+    
+    def _compact_aggregate_file(self):
+        """Rewrite the aggregate CSV without the seconds already dropped from the front"""
+        head = self.aggregate_chunks[0][0]
+        temp_file = self.aggregate_file.with_suffix('.tmp')
+        with open(self.aggregate_file, 'rb') as src, open(temp_file, 'wb') as dst:
+            dst.write(CSV_HEADER)
+            src.seek(head)
+            shutil.copyfileobj(src, dst, 1 << 20)
+        
+        # Atomically replace the aggregate file
+        temp_file.replace(self.aggregate_file)
+        shift = head - len(CSV_HEADER)
+        self.aggregate_chunks = deque((offset - shift, count) for offset, count in self.aggregate_chunks)
+        self.aggregate_end -= shift
+    
+    def set_realtime_priority(self):
+        """Pin the calling thread to the sensor core, run it under SCHED_FIFO and lock the process in RAM (needs CAP_SYS_NICE / CAP_IPC_LOCK)"""
+        # Affinity and timer slack are per thread as well and need no privileges
+        try:
+            os.sched_setaffinity(0, {SENSOR_CORE})
+            print(f"Sensor thread pinned to CPU core {SENSOR_CORE}")
+        except (AttributeError, OSError) as e:
+            print(f"Could not pin sensor thread to core {SENSOR_CORE}: {e}")
+        if libc is not None:
+            # 1 us slack so the deadline sleeps are not coalesced late (default is 50 us)
+            if libc.prctl(PR_SET_TIMERSLACK, 1000, 0, 0, 0) == 0:
+                print("Sensor thread timer slack set to 1us")
+            else:
+                print(f"Could not set timer slack ({os.strerror(ctypes.get_errno())})")
+        
+        priority = self.config.get('sensor', {}).get('realtime_priority', 80)
+        if not priority:
+            return
+        
+        # Linux applies the policy per thread; pid 0 is the calling thread,
+        # so only the sensor loop preempts normal work, not the writer
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            print(f"Sensor thread running with SCHED_FIFO priority {priority}")
+        except (AttributeError, OSError) as e:
+            print(f"Could not set SCHED_FIFO real-time priority ({e}); grant CAP_SYS_NICE or run as root")
+        
+        # Avoid page-fault stalls mid-sample
+        if libc is not None:
+            if libc.mlockall(MCL_CURRENT | MCL_FUTURE) == 0:
+                print("Process memory locked (mlockall)")
+            else:
+                print(f"Could not lock process memory ({os.strerror(ctypes.get_errno())}); grant CAP_IPC_LOCK or run as root")
     
     def _sensor_loop(self):
         """Optimized sensor loop for high-frequency sampling"""
         print(f"Sensor loop started - Target: {self.sampling_rate} Hz ({self.sample_interval*1000:.3f}ms per sample)")
+        self.set_realtime_priority()
         
         # Pre-calculate timing constants for maximum performance
         target_interval = self.sample_interval
         samples_per_status = self.sampling_rate
         
         # Pre-allocate variables to avoid repeated allocation
-        sample_count = 0
-        last_status_time = time.perf_counter()
-        last_second_boundary = None
         samples_this_second = 0
+        # Deadline overruns, reported from the second boundary every 10 seconds
+        late_samples = 0
+        worst_lateness = 0.0
         current_second_key = None
         
         # Optimization: pre-import needed functions
         perf_counter = time.perf_counter
-        datetime_now = datetime.now
+        time_ns = time.time_ns
+        fromtimestamp = datetime.fromtimestamp
+        sleep = time.sleep
+        if clock_nanosleep is not None:
+            deadline = Timespec()
+            deadline_ref = ctypes.byref(deadline)
+        # Status lines are printed by the writer thread so a slow stdout never stalls sampling
+        log = self.write_queue.put
+        
+        # Bind per-sample attribute lookups once; the I2C reader is rebound on reconnect
+        buffer_capacity = self.buffer_capacity
+        time_buffer, accel_buffer = self.time_buffer, self.accel_buffer
+        accel_scale = ACCEL_SCALE
+        unpack_accel = ACCEL_STRUCT.unpack
+        bound_mpu = None
+        read_block = None
+        address = None
+        rdwr = None
+        read_msg = None
         
         print(f"Target interval: {target_interval*1000:.3f}ms per sample")
         
-        # Initialize second tracking
-        current_time = datetime_now()
-        current_second_key = current_time.replace(microsecond=0)
+        # Initialize second tracking on an integer epoch-second base; the
+        # datetime for a second is only built once, when that second starts
+        current_second = time_ns() // 1_000_000_000
+        current_second_key = fromtimestamp(current_second)
+        # Log prefix for the current second, formatted once per second
+        second_label = current_second_key.strftime('%H:%M:%S')
+        window_deadline = int(self.window_start.timestamp()) + self.window_duration_sec
+        
+        # Samples are paced on a fixed grid of absolute deadlines
+        next_deadline = perf_counter()
         
         while self.running:
             if self.paused:
@@ -365,133 +767,150 @@ class HighSpeedSensorService:
                     time.sleep(0.1)
                     continue
             
+            if self.mpu is not bound_mpu:
+                bound_mpu = self.mpu
+                read_block = bound_mpu.bus.read_i2c_block_data
+                address = bound_mpu.address
+                # With an smbus2 bus, prebuild the register-select write and the
+                # 6-byte read once and issue them together (repeated start)
+                rdwr = getattr(bound_mpu.bus, 'i2c_rdwr', None) if i2c_msg is not None else None
+                if rdwr is not None:
+                    select_msg = i2c_msg.write(address, [0x3B])
+                    read_msg = i2c_msg.read(address, 6)
+            
             try:
                 # High precision timing start
                 loop_start = perf_counter()
+                # Resynchronise the grid after a pause, reconnect or long
+                # overrun instead of bursting samples to catch up
+                if loop_start - next_deadline > target_interval:
+                    next_deadline = loop_start
                 
                 # Get timestamp once and reuse
-                current_time = datetime_now()
+                now_ns = time_ns()
                 
                 # Check if we've crossed a second boundary
-                new_second_key = current_time.replace(microsecond=0)
-                if new_second_key != current_second_key:
-                    # Save previous second's data
-                    with self.buffer_lock:
-                        self._save_current_buffer()
+                second = now_ns // 1_000_000_000
+                if second != current_second:
+                    # Report the second that just completed; status is a
+                    # boundary event, so nothing is checked per sample
+                    if samples_this_second > 0:
+                        log(f"[{second_label}] Achieved {samples_this_second} samples/sec (Target: {self.sampling_rate})")
+                    self.samples_this_second = samples_this_second
+                    if late_samples and second % 10 == 0:
+                        log(f"Performance: {late_samples} samples missed their deadline in the last 10s, worst {worst_lateness*1000:.3f}ms late")
+                        late_samples = 0
+                        worst_lateness = 0.0
+                    
+                    # Hand previous second's data to the writer thread
+                    self._save_current_buffer(current_second_key)
+                    time_buffer, accel_buffer = self.time_buffer, self.accel_buffer
                     
                     # Update second tracking
-                    current_second_key = new_second_key
+                    current_second = second
+                    current_second_key = fromtimestamp(second)
+                    second_label = current_second_key.strftime('%H:%M:%S')
                     samples_this_second = 0
+                    
+                    # Emit max CSV every 2 hours; the window can only expire on a
+                    # second boundary, so it is an integer compare once per second
+                    if second >= window_deadline:
+                        # The outbox file is written by the writer thread, from a
+                        # snapshot of the record, so sampling never waits on it
+                        self.write_queue.put(partial(
+                            self._emit_max_csv, self.window_start, current_second_key, self.max_record_in_window))
+                        # Reset window
+                        self.window_start = current_second_key
+                        window_deadline = second + self.window_duration_sec
+                        self.max_value_in_window = float('-inf')
+                        self.max_record_in_window = None
                 
                 # Optimized sensor read - direct I2C access
                 try:
                     # Read all 6 bytes in one I2C transaction (most efficient)
-                    raw_data = self.mpu.bus.read_i2c_block_data(self.mpu.address, 0x3B, 6)
+                    if rdwr is not None:
+                        rdwr(select_msg, read_msg)
+                        raw_data = bytes(read_msg)
+                    else:
+                        raw_data = bytes(read_block(address, 0x3B, 6))
                     
-                    # Fast data conversion - avoid float operations where possible
-                    accel_x = (raw_data[0] << 8 | raw_data[1])
-                    if accel_x > 32767: accel_x -= 65536
-                    accel_y = (raw_data[2] << 8 | raw_data[3])
-                    if accel_y > 32767: accel_y -= 65536
-                    accel_z = (raw_data[4] << 8 | raw_data[5])
-                    if accel_z > 32767: accel_z -= 65536
+                    # Fast data conversion - byte order and two's complement are
+                    # handled in C by one struct unpack, no per-axis branches
+                    accel_x, accel_y, accel_z = unpack_accel(raw_data)
                     
-                    # Convert to g-force (MPU6050 sensitivity: 16384 LSB/g for ±2g range)
-                    x = accel_x / 16384.0
-                    y = accel_y / 16384.0
-                    z = accel_z / 16384.0
+                    # Fast magnitude calculation: exact integer sum of squares on the raw
+                    # counts, then one sqrt and a single scale to g-force
+                    acceleration = sqrt(accel_x*accel_x + accel_y*accel_y + accel_z*accel_z) * accel_scale
                     
                 except Exception:
                     # Fallback to library method if direct access fails
-                    accel_data = self.mpu.get_accel_data()
+                    accel_data = bound_mpu.get_accel_data()
                     x, y, z = accel_data['x'], accel_data['y'], accel_data['z']
+                    acceleration = sqrt(x*x + y*y + z*z)
                 
-                # Fast magnitude calculation
-                acceleration_squared = x*x + y*y + z*z
-                acceleration = acceleration_squared ** 0.5
-                
-                # Add sample to buffer with precise timing
-                time_ms = current_time.microsecond / 1000.0
-                sample = {
-                    'time_ms': self._format_ms(time_ms),
-                    'acceleration': round(acceleration, 4)
-                }
+                # Add sample to buffer with precise timing (raw microseconds, formatted at write time)
+                time_us = now_ns // 1000 % 1_000_000
                 
-                with self.buffer_lock:
-                    self.current_buffer.append(sample)
+                n = self.buffer_count
+                if n < buffer_capacity:
+                    time_buffer[n] = time_us
+                    accel_buffer[n] = acceleration
+                else:
+                    # Overrun of the preallocated second; grow rather than drop
+                    time_buffer.append(time_us)
+                    accel_buffer.append(acceleration)
+                self.buffer_count = n + 1
 
                 # Update rolling 2-hour maximum (use full-precision value for comparison)
-                try:
-                    if acceleration > self.max_value_in_window:
-                        self.max_value_in_window = acceleration
-                        self.max_record_in_window = {
-                            'timestamp': current_time.isoformat(),
-                            'acceleration': round(acceleration, 6)
-                        }
-                except Exception:
-                    pass
+                if acceleration > self.max_value_in_window:
+                    self.max_value_in_window = acceleration
+                    # Raw parts only; the ISO string and rounding are built when the CSV is emitted
+                    self.max_record_in_window = (current_second_key, time_us, acceleration)
                 
                 # Counter updates
-                sample_count += 1
                 samples_this_second += 1
                 self.total_samples += 1
                 
-                # Update status infrequently to minimize overhead
-                current_perf_time = perf_counter()
-                if current_perf_time - last_status_time >= 1.0:
-                    if last_second_boundary != current_second_key:
-                        if samples_this_second > 0:
-                            print(f"[{current_second_key.strftime('%H:%M:%S')}] Achieved {samples_this_second} samples/sec (Target: {self.sampling_rate})")
-                        last_second_boundary = current_second_key
-                    last_status_time = current_perf_time
-                
-                # Precise timing control
-                elapsed = perf_counter() - loop_start
-                sleep_time = target_interval - elapsed
+                # Precise timing control: the next deadline is one interval after
+                # the previous one, not after this iteration's start, so loop
+                # overhead and wake-up latency do not accumulate as drift
+                next_deadline += target_interval
+                now = perf_counter()
+                sleep_time = next_deadline - now
                 
                 if sleep_time > 0:
-                    if sleep_time > 0.0005:  # 0.5ms threshold for sleep vs busy-wait
-                        time.sleep(sleep_time)
+                    if clock_nanosleep is not None:
+                        # Kernel wakes the thread at the absolute deadline; no spinning
+                        deadline.tv_sec = int(next_deadline)
+                        deadline.tv_nsec = int((next_deadline - deadline.tv_sec) * 1e9)
+                        clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, deadline_ref, None)
                     else:
-                        # Aggressive busy-wait for sub-millisecond precision
-                        target_time = loop_start + target_interval
-                        while perf_counter() < target_time:
-                            pass
+                        # No busy-wait: time.sleep uses a high-resolution timer, and any
+                        # late wake-up is absorbed by the fixed deadline grid
+                        sleep(sleep_time)
                 else:
-                    # Log performance issues less frequently
-                    if sample_count % (self.sampling_rate * 10) == 0:
-                        behind_ms = (elapsed - target_interval) * 1000
-                        achieved_hz = 1.0 / elapsed if elapsed > 0 else 0
-                        print(f"Performance: {behind_ms:.1f}ms behind, achieving ~{achieved_hz:.0f} Hz")
-                
-                # Emit max CSV every 2 hours
-                try:
-                    from datetime import datetime as _dt
-                    if (current_time - self.window_start).total_seconds() >= self.window_duration_sec:
-                        self._emit_max_csv(window_start=self.window_start, window_end=current_time)
-                        # Reset window
-                        self.window_start = _dt.now()
-                        self.max_value_in_window = float('-inf')
-                        self.max_record_in_window = None
-                except Exception as _e:
-                    # Non-fatal; continue sampling
-                    pass
+                    # Already past the next deadline (slow iteration or late wake-up);
+                    # only counted here, it is reported on a second boundary
+                    late_samples += 1
+                    if -sleep_time > worst_lateness:
+                        worst_lateness = -sleep_time
                 
             except Exception as e:
-                print(f"[{datetime_now().strftime('%H:%M:%S')}] Sensor error: {e}")
+                print(f"[{second_label}] Sensor error: {e}")
                 self.connected = False
                 self.mpu = None
                 time.sleep(0.01)
         
         # Save any remaining data when stopping
-        with self.buffer_lock:
-            self._save_current_buffer()
+        self._save_current_buffer(current_second_key)
         
         print("Sensor loop ended")
 
-    def _emit_max_csv(self, window_start, window_end):
+    def _emit_max_csv(self, window_start, window_end, record):
         """Write a one-row CSV into outbox/ containing the highest acceleration observed in the 2-hour window."""
-        if not self.max_record_in_window:
+        # The record is the closed window's snapshot; never fall back to the live
+        # record, which already belongs to the next window
+        if record is None:
             return
         try:
             # Filename includes window start/end for traceability
@@ -506,40 +925,86 @@ class HighSpeedSensorService:
             with open(out_tmp, 'w', newline='') as f:
                 w = csv.writer(f)
                 w.writerow(['Timestamp', 'Acceleration'])
-                w.writerow([self.max_record_in_window['timestamp'], self.max_record_in_window['acceleration']])
+                second, micros, acceleration = record
+                w.writerow([second.replace(microsecond=micros).isoformat(), round(acceleration, 6)])
             out_tmp.replace(out_path)
             print(f"[MAX] Emitted window max CSV: {out_path}")
         except Exception as e:
             print(f"Error writing max CSV: {e}")
     
+    def _walk(self, directory=None, prefix=''):
+        """Yield (relative path, stat result) for every reading CSV in one os.scandir pass"""
+        with os.scandir(directory or self.readings_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk(entry.path, prefix + entry.name + os.sep)
+                elif entry.name.endswith('.csv') and entry.name != "aggregate_data.csv":
+                    yield prefix + entry.name, entry.stat()
+    
+    def _ensure_index(self) -> dict:
+        """Return the file index, walking the tree only the first time (caller holds index_lock)"""
+        if self.file_index is None:
+            self.file_index = {relpath: (stat.st_size, stat.st_mtime) for relpath, stat in self._walk()}
+        return self.file_index
+    
+    def _index_entries(self) -> list:
+        """Snapshot the file index as (relative path, (size, mtime)) pairs"""
+        with self.index_lock:
+            return list(self._ensure_index().items())
+    
+    def _index_update(self, add=None, remove=None, remove_prefix=None):
+        """Apply a writer-side change to the file index (no-op until the index has been built)"""
+        with self.index_lock:
+            index = self.file_index
+            if index is None:
+                return
+            if add:
+                relpath, stat = add
+                index[relpath] = (stat.st_size, stat.st_mtime)
+            if remove:
+                index.pop(remove, None)
+            if remove_prefix:
+                for relpath in [p for p in index if p.startswith(remove_prefix)]:
+                    del index[relpath]
+    
+    def _index_find(self, filename: str):
+        """Resolve a relative path or bare HHMMSS.csv name to an indexed relative path (newest match wins)"""
+        with self.index_lock:
+            index = self._ensure_index()
+            if filename in index:
+                return filename
+            suffix = os.sep + filename
+            matches = [relpath for relpath in index if relpath.endswith(suffix)]
+        return max(matches) if matches else None
+    
     def get_file_list(self) -> list:
         """Get list of all CSV files in readings directory"""
+        cache = self.file_list_cache
+        if cache and cache[0] == self.files_version:
+            return cache[1]
+        
         try:
-            csv_files = []
-            for csv_file in self.readings_dir.rglob("*.csv"):
-                # Skip the aggregate file
-                if csv_file.name == "aggregate_data.csv":
-                    continue
-                # Get relative path from readings directory
-                relative_path = csv_file.relative_to(self.readings_dir)
-                csv_files.append(str(relative_path))
-            return sorted(csv_files, reverse=True)  # Most recent first
+            version = self.files_version
+            csv_files = [relpath for relpath, _ in self._index_entries()]
+            csv_files.sort(reverse=True)  # Most recent first
+            self.file_list_cache = (version, csv_files)
+            return csv_files
         except Exception as e:
             print(f"Error getting file list: {e}")
             return []
     
     def get_folder_structure(self) -> dict:
         """Get hierarchical folder structure for calendar view"""
+        cache = self.folder_structure_cache
+        if cache and cache[0] == self.files_version:
+            return cache[1]
+        
         try:
+            version = self.files_version
             structure = {}
             
-            for csv_file in self.readings_dir.rglob("*.csv"):
-                # Skip the aggregate file
-                if csv_file.name == "aggregate_data.csv":
-                    continue
-                    
-                relative_path = csv_file.relative_to(self.readings_dir)
-                parts = relative_path.parts
+            for relative_path, (size, modified) in self._index_entries():
+                parts = relative_path.split(os.sep)
                 
                 if len(parts) >= 4:  # year/month/week/day/file.csv
                     year, month, week, day = parts[:4]
@@ -557,11 +1022,12 @@ class HighSpeedSensorService:
                     
                     structure[year][month][week][day].append({
                         'filename': filename,
-                        'path': str(relative_path),
-                        'size': csv_file.stat().st_size,
-                        'modified': csv_file.stat().st_mtime
+                        'path': relative_path,
+                        'size': size,
+                        'modified': modified
                     })
             
+            self.folder_structure_cache = (version, structure)
             return structure
         except Exception as e:
             print(f"Error getting folder structure: {e}")
@@ -569,40 +1035,71 @@ class HighSpeedSensorService:
     
     def get_latest_file(self) -> str:
         """Get the most recent CSV file"""
+        if self.latest_file:
+            return self.latest_file
         files = self.get_file_list()
         return files[0] if files else None
     
     def get_file_stats(self) -> dict:
         """Get statistics about CSV files"""
-        files = self.get_file_list()
-        total_size = 0
+        cache = self.file_stats_cache
+        if cache and cache[0] == self.files_version:
+            return cache[1]
         
         try:
-            for filename in files:
-                filepath = self.readings_dir / filename
-                if filepath.exists():
-                    total_size += filepath.stat().st_size
+            version = self.files_version
+            files = []
+            total_size = 0
+            for relpath, (size, _) in self._index_entries():
+                files.append(relpath)
+                total_size += size
+            files.sort(reverse=True)  # Most recent first
+            self.file_list_cache = (version, files)
             
-            return {
+            stats = {
                 'total_files': len(files),
                 'total_size_mb': round(total_size / (1024 * 1024), 2),
                 'latest_file': files[0] if files else None,
                 'oldest_file': files[-1] if files else None
             }
+            self.file_stats_cache = (version, stats)
+            return stats
         except Exception as e:
             print(f"Error getting file stats: {e}")
             return {'total_files': 0, 'total_size_mb': 0}
     
+    @staticmethod
+    def _tail_lines(path, count):
+        """Return the header line and the last `count` lines of a CSV file, scanning back from the end over an mmap"""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return '', []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header_end = mm.find(b'\n') + 1 or size
+                # Ignore the final newline, then step back one line per rfind
+                cursor = size - 1 if mm[size - 1] == 0x0A else size
+                start = size
+                for _ in range(count):
+                    newline = mm.rfind(b'\n', header_end, cursor)
+                    if newline < 0:
+                        # Fewer lines than requested: take everything after the header
+                        start = header_end
+                        break
+                    cursor = newline
+                    start = newline + 1
+                return mm[:header_end].decode(), mm[start:].decode().splitlines()
+    
     def load_csv_data(self, filename: str) -> list:
         """Load CSV data from file"""
-        # Find the CSV file in the hierarchical structure
+        # Find the CSV file in the hierarchical structure via the file index
         csv_path = None
-        
-        # Search in the readings directory structure
-        for csv_file in self.readings_dir.rglob("*.csv"):
-            if csv_file.name == filename or str(csv_file.relative_to(self.readings_dir)) == filename:
-                csv_path = csv_file
-                break
+        if filename == self.aggregate_file.name:
+            csv_path = self.aggregate_file
+        else:
+            relpath = self._index_find(filename)
+            if relpath:
+                csv_path = self.readings_dir / relpath
         
         if not csv_path or not csv_path.exists():
             raise FileNotFoundError(f"CSV file {filename} not found")
@@ -610,51 +1107,54 @@ class HighSpeedSensorService:
         # Read CSV data
         data_points = []
         try:
-            with open(csv_path, 'r') as csvfile:
-                reader = csv.DictReader(csvfile)
-                # Derive base datetime from folder structure and filename (HHMMSS.csv)
-                try:
-                    rel = csv_path.relative_to(self.readings_dir)
-                    parts = rel.parts
-                    # Expected: year/month/week/day/file.csv
-                    year = int(parts[0])
-                    month = int(parts[1])
-                    day = int(parts[3])
-                    file_name = parts[-1]
-                    time_str = file_name.replace('.csv', '')
-                    hour = int(time_str[0:2])
-                    minute = int(time_str[2:4])
-                    second = int(time_str[4:6])
-                    base_dt = datetime(year, month, day, hour, minute, second)
-                except Exception:
-                    base_dt = None
+            # Only the last 1000 rows are returned, so only those lines are read
+            header_line, tail = self._tail_lines(csv_path, 1000)
+            header = next(csv.reader([header_line]), [])
+            
+            time_col = header.index('Time (ms)') if 'Time (ms)' in header else None
+            stamp_col = header.index('Timestamp') if 'Timestamp' in header else None
+            accel_col = header.index('Acceleration') if 'Acceleration' in header else None
+            
+            # Derive base timestamp from folder structure and filename (HHMMSS.csv)
+            try:
+                rel = csv_path.relative_to(self.readings_dir)
+                parts = rel.parts
+                # Expected: year/month/week/day/file.csv
+                year = int(parts[0])
+                month = int(parts[1])
+                day = int(parts[3])
+                file_name = parts[-1]
+                time_str = file_name.replace('.csv', '')
+                hour = int(time_str[0:2])
+                minute = int(time_str[2:4])
+                second = int(time_str[4:6])
+                base_ts = datetime(year, month, day, hour, minute, second).timestamp()
+            except Exception:
+                base_ts = None
 
-                for row in reader:
-                    # Support both headers
-                    if 'Time (ms)' in row and row['Time (ms)'] and base_dt is not None:
-                        # Parse like '3.2122ms' → add to base_dt
-                        raw = row['Time (ms)'].strip()
-                        if raw.endswith('ms'):
-                            raw = raw[:-2]
-                        try:
-                            ms = float(raw)
-                        except ValueError:
-                            ms = 0.0
-                        ts = (base_dt if base_dt else datetime.now())
-                        ts = ts.timestamp() + (ms / 1000.0)
-                        iso_ts = datetime.fromtimestamp(ts).isoformat()
-                        data_points.append({
-                            'timestamp': iso_ts,
-                            'acceleration': float(row['Acceleration'])
-                        })
-                    elif 'Timestamp' in row and row['Timestamp']:
-                        data_points.append({
-                            'timestamp': row['Timestamp'],
-                            'acceleration': float(row['Acceleration'])
-                        })
+            for row in csv.reader(tail):
+                # Support both headers
+                if time_col is not None and base_ts is not None and len(row) > time_col and row[time_col]:
+                    # Parse like '3.2122ms' → add to base timestamp
+                    raw = row[time_col].strip()
+                    if raw.endswith('ms'):
+                        raw = raw[:-2]
+                    try:
+                        ms = float(raw)
+                    except ValueError:
+                        ms = 0.0
+                    iso_ts = datetime.fromtimestamp(base_ts + (ms / 1000.0)).isoformat()
+                    data_points.append({
+                        'timestamp': iso_ts,
+                        'acceleration': float(row[accel_col])
+                    })
+                elif stamp_col is not None and len(row) > stamp_col and row[stamp_col]:
+                    data_points.append({
+                        'timestamp': row[stamp_col],
+                        'acceleration': float(row[accel_col])
+                    })
             
-            # Limit to last 1000 points for performance
-            return data_points[-1000:] if len(data_points) > 1000 else data_points
+            return data_points
             
         except Exception as e:
             raise Exception(f"Error reading CSV file: {str(e)}")
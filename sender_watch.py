@@ -70,6 +70,22 @@ def move_with_timestamp(src: Path, dst_dir: Path) -> Path:
     return dst
 
 
+def upload_and_archive(path: Path) -> None:
+    ok = False
+    for attempt in range(1, RETRIES + 1):
+        log(f"Attempt {attempt}/{RETRIES} uploading {path.name}")
+        if upload_one(path):
+            ok = True
+            break
+        time.sleep(2)
+    if ok:
+        dst = move_with_timestamp(path, SENT_DIR)
+        log(f"Uploaded and archived to: {dst}")
+    else:
+        dst = move_with_timestamp(path, FAILED_DIR)
+        log(f"Failed after retries; moved to: {dst}")
+
+
 # Optional dependency: watchdog for real-time events
 try:
     from watchdog.observers import Observer
@@ -77,6 +93,14 @@ try:
     HAVE_WATCHDOG = True
 except Exception:
     HAVE_WATCHDOG = False
+    FileSystemEventHandler = object  # keeps CsvCreatedHandler importable
+
+# Optional dependency: inotify_simple for kernel-driven events on Linux
+try:
+    from inotify_simple import INotify, flags
+    HAVE_INOTIFY = True
+except Exception:
+    HAVE_INOTIFY = False
 
 
 class CsvCreatedHandler(FileSystemEventHandler):
@@ -122,19 +146,7 @@ class CsvCreatedHandler(FileSystemEventHandler):
                 if not is_stable(path, STABILITY_WAIT_SEC):
                     log(f"File not stable yet, skipping for now: {path.name}")
                     return
-            ok = False
-            for attempt in range(1, RETRIES + 1):
-                log(f"Attempt {attempt}/{RETRIES} uploading {path.name}")
-                if upload_one(path):
-                    ok = True
-                    break
-                time.sleep(2)
-            if ok:
-                dst = move_with_timestamp(path, SENT_DIR)
-                log(f"Uploaded and archived to: {dst}")
-            else:
-                dst = move_with_timestamp(path, FAILED_DIR)
-                log(f"Failed after retries; moved to: {dst}")
+            upload_and_archive(path)
         finally:
             if path in self.processing:
                 self.processing.remove(path)
@@ -157,8 +169,41 @@ def run_watchdog() -> int:
     return 0
 
 
+def run_inotify() -> int:
+    inotify = INotify()
+    # CLOSE_WRITE/MOVED_TO only fire once the writer is done, so no stability wait is needed
+    inotify.add_watch(str(OUTBOX_DIR), flags.CLOSE_WRITE | flags.MOVED_TO)
+    log(f"Watching {OUTBOX_DIR} for *{PATTERN_EXT} (inotify)")
+    try:
+        # Pick up anything that landed before the watch was registered; a file
+        # still being written is left for its CLOSE_WRITE/MOVED_TO event
+        for path in sorted(OUTBOX_DIR.glob(f"*{PATTERN_EXT}")):
+            if not path.is_file() or path.stat().st_size == 0:
+                continue
+            if not is_stable(path, STABILITY_WAIT_SEC):
+                log(f"File not stable yet, waiting for close: {path.name}")
+                continue
+            upload_and_archive(path)
+        while True:
+            for event in inotify.read():
+                if not event.name.endswith(PATTERN_EXT):
+                    continue
+                path = OUTBOX_DIR / event.name
+                try:
+                    if path.stat().st_size == 0:
+                        continue
+                except FileNotFoundError:
+                    continue
+                upload_and_archive(path)
+    except KeyboardInterrupt:
+        log("Stopped by user")
+    finally:
+        inotify.close()
+    return 0
+
+
 def run_polling() -> int:
-    log("watchdog not available; falling back to polling. Install with: pip install watchdog")
+    log("inotify_simple/watchdog not available; falling back to polling. Install with: pip install inotify_simple")
     seen: Dict[Path, float] = {}
     try:
         while True:
@@ -176,19 +221,7 @@ def run_polling() -> int:
                     if not is_stable(path, STABILITY_WAIT_SEC):
                         log(f"File not stable yet, skipping: {path.name}")
                         continue
-                ok = False
-                for attempt in range(1, RETRIES + 1):
-                    log(f"Attempt {attempt}/{RETRIES} uploading {path.name}")
-                    if upload_one(path):
-                        ok = True
-                        break
-                    time.sleep(2)
-                if ok:
-                    dst = move_with_timestamp(path, SENT_DIR)
-                    log(f"Uploaded and archived to: {dst}")
-                else:
-                    dst = move_with_timestamp(path, FAILED_DIR)
-                    log(f"Failed after retries; moved to: {dst}")
+                upload_and_archive(path)
             time.sleep(1)
     except KeyboardInterrupt:
         log("Stopped by user")
@@ -197,6 +230,8 @@ def run_polling() -> int:
 
 def main() -> int:
     ensure_dirs()
+    if HAVE_INOTIFY:
+        return run_inotify()
     if HAVE_WATCHDOG:
         return run_watchdog()
     else:
@@ -9,6 +9,7 @@ Defaults (override via environment variables):
   LISTEN_HOST=0.0.0.0
   LISTEN_PORT=2121
   CSV_SAVE_PATH=received_data.csv
+  CSV_FSYNC=0          (set to 1 to fsync once per finished connection)
 
 Usage:
   python3 tcp_csv_listener.py
@@ -41,6 +42,9 @@ from datetime import datetime
 LISTEN_HOST = os.getenv("LISTEN_HOST", "0.0.0.0")
 LISTEN_PORT = int(os.getenv("LISTEN_PORT", "2121"))
 CSV_SAVE_PATH = os.getenv("CSV_SAVE_PATH", "received_data.csv")
+CSV_FSYNC = os.getenv("CSV_FSYNC", "0") == "1"
+# A partial line longer than this is written through instead of waiting for its '\n'
+MAX_LINE_BYTES = 1 << 20
 
 print(f"[INFO] Listening on {LISTEN_HOST}:{LISTEN_PORT}")
 print(f"[INFO] Appending to {CSV_SAVE_PATH}")
@@ -52,35 +56,74 @@ def log(msg: str) -> None:
     print(f"[{ts}] {msg}", flush=True)
 
 
-def handle_client(conn: socket.socket, addr) -> None:
+def handle_client(conn: socket.socket, addr, csv_fh) -> None:
     log(f"Connection from {addr}")
+    received = 0
+    pending = bytearray()
     # Stream data and append as text (UTF-8, ignore bad bytes)
-    with conn:
-        with lock:
-            # Ensure directory exists for CSV_SAVE_PATH
-            dirname = os.path.dirname(os.path.abspath(CSV_SAVE_PATH))
-            if dirname and not os.path.exists(dirname):
-                os.makedirs(dirname, exist_ok=True)
-        with open(CSV_SAVE_PATH, "a", encoding="utf-8", errors="ignore") as f:
+    try:
+        with conn:
             while True:
                 data = conn.recv(64 * 1024)
                 if not data:
                     break
-                f.write(data.decode("utf-8", errors="ignore"))
-        log(f"Data appended to {CSV_SAVE_PATH}")
+                received += len(data)
+                pending += data
+                # Hand over complete lines only, so concurrent senders sharing the
+                # append handle interleave between CSV records, never inside one
+                end = pending.rfind(b"\n") + 1
+                if not end and len(pending) > MAX_LINE_BYTES:
+                    # No line break in sight: write through rather than buffer without limit
+                    end = len(pending)
+                if end:
+                    with lock:
+                        csv_fh.write(pending[:end].decode("utf-8", errors="ignore"))
+                    del pending[:end]
+    except OSError as e:
+        log(f"Connection from {addr} failed: {e}")
+    finally:
+        if received:
+            # Trailing partial line, then one flush (and optional fsync) per connection, never per chunk
+            with lock:
+                if pending:
+                    csv_fh.write(pending.decode("utf-8", errors="ignore"))
+                csv_fh.flush()
+                if CSV_FSYNC:
+                    os.fsync(csv_fh.fileno())
+            log(f"Data appended to {CSV_SAVE_PATH}")
 
 
 def main() -> None:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+    # Ensure directory exists for CSV_SAVE_PATH
+    dirname = os.path.dirname(os.path.abspath(CSV_SAVE_PATH))
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    # One long-lived append handle shared by all clients, flushed once per connection
+    with open(CSV_SAVE_PATH, "a", encoding="utf-8", errors="ignore", buffering=1 << 16) as csv_fh, \
+            socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         # Allow quick restart
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind((LISTEN_HOST, LISTEN_PORT))
         s.listen(50)
         log("Server ready. Waiting for connections...")
-        while True:
-            conn, addr = s.accept()
-            t = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
-            t.start()
+        clients = []  # (handler thread, connection) still being served
+        try:
+            while True:
+                conn, addr = s.accept()
+                t = threading.Thread(target=handle_client, args=(conn, addr, csv_fh), daemon=True)
+                t.start()
+                clients = [c for c in clients if c[0].is_alive()]
+                clients.append((t, conn))
+        finally:
+            # End the handlers' recv() and let them write their last bytes
+            # before the shared handle is closed
+            for t, conn in clients:
+                try:
+                    conn.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass  # already closed by its handler
+            for t, conn in clients:
+                t.join(timeout=5)
 
 
 if __name__ == "__main__":